@@ -0,0 +1,8 @@
+"""Test setup: import the app from the backend directory with throwaway local data"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("MAKEMYCV_DATA_DIR", tempfile.mkdtemp(prefix="makemycv-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,138 @@
+"""Agent run completion by callback and by polling, against a local stand-in for Agent.ai"""
+
+import asyncio
+import json
+import time
+from typing import Optional
+
+import httpx
+import pytest
+
+import main
+
+WEBHOOK_URL = "http://agent.test/v1/agent/stand-in/webhook/1"
+CALLBACK_BASE_URL = "http://api.test"
+
+
+class StandInAgent:
+    """
+    Mimics an Agent.ai webhook: `POST /async` starts a run, `GET /status/{run_id}`
+    answers 204 until the run is ready and 200 with the response afterwards.
+    With `callback_after` set, the result is also POSTed to the run's callback_url,
+    which is served by the real app.
+    """
+    
+    def __init__(self, ready_after_polls: int = 0, callback_after: Optional[float] = None):
+        self.ready_after_polls = ready_after_polls
+        self.callback_after = callback_after
+        self.payloads = []
+        self.polls = 0
+        self.callback_status = None
+        self.response = {"name": "Ada Lovelace"}
+        self.start_body = {"run_id": "run-1"}
+    
+    async def deliver_callback(self, callback_url: str) -> None:
+        await asyncio.sleep(self.callback_after)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url=CALLBACK_BASE_URL) as client:
+            response = await client.post(callback_url, json={"response": self.response})
+        self.callback_status = response.status_code
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST" and request.url.path.endswith("/async"):
+            payload = json.loads(request.content)
+            self.payloads.append(payload)
+            if self.callback_after is not None and "callback_url" in payload:
+                asyncio.get_running_loop().create_task(self.deliver_callback(payload["callback_url"]))
+            return httpx.Response(200, json=self.start_body)
+        if request.method == "GET" and "/status/" in request.url.path:
+            self.polls += 1
+            if self.polls > self.ready_after_polls:
+                return httpx.Response(200, json={"response": self.response})
+            return httpx.Response(204)
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    def install(agent: StandInAgent, callback_base_url: str = CALLBACK_BASE_URL, fallback_interval: float = 30):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(agent.handler))
+        monkeypatch.setattr(main, "agent_client", client)
+        monkeypatch.setattr(main, "AGENT_CALLBACK_BASE_URL", callback_base_url)
+        monkeypatch.setattr(main, "AGENT_CALLBACK_POLL_INTERVAL", fallback_interval)
+        return agent
+    return install
+
+
+def run_agent(max_wait_seconds: float = 5):
+    return asyncio.run(main.run_agent(
+        WEBHOOK_URL, "ada", max_wait_seconds, label="Profile",
+        poll_interval=0.01, poll_step=0.01, poll_max=0.05
+    ))
+
+
+def test_callback_completes_run_without_polling(stand_in):
+    agent = stand_in(StandInAgent(ready_after_polls=1000, callback_after=0.05))
+    
+    started = time.monotonic()
+    result = run_agent()
+    
+    assert result == {"success": True, "data": agent.response, "error": None, "run_id": "run-1"}
+    assert time.monotonic() - started < 2
+    assert agent.callback_status == 200
+    assert agent.polls == 0
+    assert agent.payloads[0]["callback_url"].startswith(f"{CALLBACK_BASE_URL}/internal/agent-callback/")
+    assert len(main.agent_callbacks) == 0
+
+
+def test_polling_fallback_when_callback_never_arrives(stand_in):
+    agent = stand_in(StandInAgent(ready_after_polls=2), fallback_interval=0.02)
+    
+    result = run_agent()
+    
+    assert result["success"] is True
+    assert result["data"] == agent.response
+    assert agent.polls == 3
+    assert "callback_url" in agent.payloads[0]
+    assert len(main.agent_callbacks) == 0
+
+
+def test_polling_only_without_callback_base_url(stand_in):
+    agent = stand_in(StandInAgent(ready_after_polls=1), callback_base_url="")
+    
+    result = run_agent()
+    
+    assert result["success"] is True
+    assert agent.polls == 2
+    assert "callback_url" not in agent.payloads[0]
+
+
+def test_timeout_keeps_408_wording(stand_in):
+    stand_in(StandInAgent(ready_after_polls=1000), fallback_interval=0.02)
+    
+    result = run_agent(max_wait_seconds=0.1)
+    
+    assert result["success"] is False
+    assert "Timeout" in result["error"]
+    assert len(main.agent_callbacks) == 0
+
+
+def test_non_object_json_is_an_error_result(stand_in):
+    agent = stand_in(StandInAgent(), callback_base_url="")
+    agent.start_body = ["run-1"]
+    
+    result = run_agent()
+    
+    assert result["success"] is False
+    assert result["error"].startswith("Unexpected error: ")
+
+
+def test_unknown_callback_nonce_is_404():
+    async def post_callback():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url=CALLBACK_BASE_URL) as client:
+            return await client.post("/internal/agent-callback/not-a-nonce", json={"response": {}})
+    
+    response = asyncio.run(post_callback())
+    
+    assert response.status_code == 404
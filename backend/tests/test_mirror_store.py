@@ -0,0 +1,92 @@
+"""Incremental re-summaries from a local bare mirror, against a throwaway git repository"""
+
+import asyncio
+import os
+import tempfile
+
+import git
+import pytest
+
+import main
+
+REPO = "octo/notes"
+
+
+def write_files(repo: git.Repo, files: dict, message: str) -> str:
+    for file_path, text in files.items():
+        full_path = os.path.join(repo.working_dir, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    repo.index.add(list(files))
+    return repo.index.commit(message).hexsha
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """A local "remote" repository, served to MirrorStore in place of github.com"""
+    repo = git.Repo.init(tmp_path / "source")
+    # Serve partial (blobless) clones like GitHub does
+    with repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+    monkeypatch.setattr(main, "github_clone_url", lambda repo_full_name, token=None: f"file://{repo.working_dir}")
+    monkeypatch.setattr(main, "mirror_store", main.MirrorStore(str(tmp_path / "mirrors"), 1 << 30, 1 << 20))
+
+    async def size_kb(repo_full_name, token=None):
+        return 1
+
+    monkeypatch.setattr(main, "fetch_repo_size_kb", size_kb)
+    return repo
+
+
+async def summarize(commit_sha: str) -> dict:
+    """Records of a full ingest of `commit_sha`, shaped like a stored summary"""
+    worktree = os.path.join(tempfile.mkdtemp(prefix="makemycv-test-"), "octo-notes")
+    async with main.mirror_store.checkout(REPO, None, commit_sha, worktree):
+        summary, tree, content = await asyncio.to_thread(main.ingest, worktree)
+    return {
+        "commit": commit_sha,
+        "summary": summary,
+        "tree": tree,
+        "records": main.analyze_digest(main.DigestIndex(content))
+    }
+
+
+def test_changed_paths_are_checked_out_literally(source):
+    first = write_files(source, {
+        "#notes.md": "draft\n",
+        "!todo.md": "nothing yet\n",
+        "README.md": "top\n",
+        "docs/README.md": "nested\n",
+        "app.py": "print('hi')\n"
+    }, "initial")
+
+    async def scenario():
+        previous = await summarize(first)
+        second = write_files(source, {
+            "#notes.md": "final notes\n",
+            "!todo.md": "ship it\n",
+            "README.md": "top, revised\n"
+        }, "edit")
+
+        checked_out = []
+        add_worktree = main.MirrorStore.add_worktree
+
+        def spy(path, commit_sha, dest, *args):
+            add_worktree(path, commit_sha, dest, *args)
+            for root, dirs, files in os.walk(dest):
+                dirs[:] = [d for d in dirs if d != ".git"]
+                checked_out.extend(os.path.relpath(os.path.join(root, f), dest) for f in files if f != ".git")
+
+        main.mirror_store.add_worktree = spy
+        updated = await main._summarize_changes(REPO, None, {}, previous, second)
+        return updated, checked_out
+
+    updated, checked_out = asyncio.run(scenario())
+
+    mirror = git.Repo(main.mirror_store._path(REPO))
+    assert mirror.git.config("remote.origin.partialclonefilter") == "blob:none"
+    assert sorted(checked_out) == ["!todo.md", "#notes.md", "README.md"]
+    assert sorted(record["path"] for record in updated["records"]) == sorted(
+        ["#notes.md", "!todo.md", "README.md", "docs/README.md", "app.py"]
+    )